@@ -0,0 +1,271 @@
+"""On-disk cache of generated C code, keyed by source content."""
+
+import hashlib
+import os
+import platform
+import re
+import shutil
+import stat
+import sys
+import tempfile
+from functools import lru_cache
+from typing import Optional
+
+from codegen import write_c_code
+from setup import VERSION
+
+
+def _default_cache_dir() -> str:
+    """Per-user cache location: %LOCALAPPDATA% on Windows, otherwise
+    $XDG_CACHE_HOME (or ~/.cache)."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(
+            os.path.expanduser("~"), "AppData", "Local"
+        )
+        return os.path.join(base, "zlang", "cache")
+    base = os.environ.get("XDG_CACHE_HOME", "")
+    if not os.path.isabs(base):
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "zlang")
+
+
+CACHE_DIR = _default_cache_dir()
+
+# Least recently used entries are evicted once the cache grows past this
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Suffixes of the files the cache owns (entries and in-flight temporaries)
+CACHE_SUFFIXES = (".c", ".bin", ".tmp")
+
+# IMPORT lines; imported sources feed into the cache key as well. The
+# operand is the lexer's first token: a quoted string or a whitespace run.
+IMPORT_LINE_RE = re.compile(
+    r'^[ \t]*IMPORT[ \t]+(?:"([^"]*)"|(\S+))', re.MULTILINE | re.IGNORECASE
+)
+
+# Modules that decide what C a source file turns into
+COMPILER_MODULES = ("lexer.py", "optimizer.py", "semantics.py", "codegen.py")
+
+
+@lru_cache(maxsize=None)
+def compiler_fingerprint() -> bytes:
+    """Digest of VERSION and the compiler's own sources.
+
+    Editing the compiler without a version bump still invalidates every
+    entry. Frozen builds have no sources on disk; VERSION stands in for them.
+    """
+    h = hashlib.blake2b(VERSION.encode(), digest_size=16)
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in COMPILER_MODULES:
+        try:
+            with open(os.path.join(here, name), "rb") as f:
+                h.update(f.read())
+        except OSError:
+            h.update(b"missing\0")
+    return h.digest()
+
+
+def cache_key(z_file: str) -> str:
+    """Hash a source file, everything it imports, and the compiler itself.
+
+    Imports are resolved the same way codegen resolves them: relative to the
+    importing file first, then as given. A missing import is hashed as
+    missing, so creating the file later invalidates the entry.
+    """
+    h = hashlib.blake2b(compiler_fingerprint(), digest_size=16)
+    seen = set()
+    pending = [os.path.abspath(z_file)]
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        h.update(path.encode("utf-8", "surrogateescape") + b"\0")
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            h.update(b"missing\0")
+            continue
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+
+        current_dir = os.path.dirname(path)
+        text = data.decode("utf-8", "surrogateescape")
+        for match in IMPORT_LINE_RE.finditer(text):
+            quoted, bare = match.groups()
+            file_name = quoted if quoted is not None else bare
+            import_path = os.path.join(current_dir, file_name)
+            if not os.path.exists(import_path):
+                import_path = file_name
+            pending.append(os.path.abspath(import_path))
+    return h.hexdigest()
+
+
+def cached_c_file(key: str) -> Optional[str]:
+    """Return the path of the cached C file for key, or None on a miss."""
+    return _lookup(key + ".c")
+
+
+def store_c_file(key: str, c_lines) -> None:
+    """Store generated C lines under key. Failures are ignored: the cache is
+    only an optimization, and a partially written entry is never visible
+    because the file is moved into place with os.replace.
+    """
+    _store(key + ".c", lambda f: write_c_code(c_lines, f))
+
+
+def store_c_copy(key: str, c_file: str) -> None:
+    """Store an already written C file under key (see store_c_file)."""
+
+    def copy(f):
+        with open(c_file, "r", encoding="utf-8") as src:
+            shutil.copyfileobj(src, f)
+
+    _store(key + ".c", copy)
+
+
+def artifact_key(source_key: str, compiler_cmd, flags, output_format: str) -> str:
+    """Key for a compiled executable or assembly file.
+
+    Combines the source key with the output format, compiler command and
+    flags. The compiler binary's size and mtime stand in for its version, so
+    upgrading the compiler invalidates the entry without running it. Code
+    built with -march=native only runs on the CPU it was built for, so those
+    entries are also tied to the machine type and host (a cache in a shared
+    home directory can be seen from several machines).
+    """
+    h = hashlib.blake2b(source_key.encode(), digest_size=16)
+    for part in (output_format, *compiler_cmd, *flags):
+        h.update(part.encode("utf-8", "surrogateescape") + b"\0")
+    if "-march=native" in flags:
+        h.update(f"{platform.machine()}:{platform.node()}".encode())
+    compiler_path = shutil.which(compiler_cmd[0])
+    if compiler_path:
+        st = os.stat(compiler_path)
+        h.update(f"{compiler_path}:{st.st_size}:{st.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+def cached_artifact(key: str) -> Optional[str]:
+    """Return the path of the cached artifact for key, or None on a miss."""
+    return _lookup(key + ".bin")
+
+
+def store_artifact(key: str, path: str) -> None:
+    """Store a compiled artifact (keeping its permission bits) under key."""
+
+    def copy(f):
+        with open(path, "rb") as src:
+            shutil.copyfileobj(src, f)
+
+    _store(key + ".bin", copy, binary=True, mode_from=path)
+
+
+def clear_cache() -> int:
+    """Remove every cache entry and return how many files were removed."""
+    directory = _cache_dir()
+    if directory is None:
+        return 0
+    removed = 0
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(CACHE_SUFFIXES):
+                    continue
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return removed
+
+
+def _cache_dir(create: bool = False) -> Optional[str]:
+    """CACHE_DIR if it is safe to use, else None.
+
+    Cached executables get run, so the directory has to be private: on POSIX
+    a real directory (not a symlink) owned by the current user, without
+    group or other write permission. Anything else is treated as no cache.
+    """
+    try:
+        if create:
+            os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        st = os.lstat(CACHE_DIR)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode):
+        return None
+    if hasattr(os, "getuid") and (
+        st.st_uid != os.getuid() or st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+    ):
+        return None
+    return CACHE_DIR
+
+
+def _lookup(name: str) -> Optional[str]:
+    directory = _cache_dir()
+    if directory is None:
+        return None
+    path = os.path.join(directory, name)
+    try:
+        # Refresh the mtime, which eviction uses as the last-used time
+        os.utime(path)
+    except OSError:
+        return None
+    return path if os.path.isfile(path) else None
+
+
+def _evict(directory: str) -> None:
+    """Remove least recently used entries until the cache fits CACHE_MAX_BYTES."""
+    entries = []
+    total = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.endswith((".c", ".bin")):
+                st = entry.stat(follow_symlinks=False)
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+    if total <= CACHE_MAX_BYTES:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        if total <= CACHE_MAX_BYTES:
+            break
+
+
+def _store(
+    name: str, fill, binary: bool = False, mode_from: Optional[str] = None
+) -> None:
+    tmp_path = None
+    try:
+        directory = _cache_dir(create=True)
+        if directory is None:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        if binary:
+            f = os.fdopen(fd, "wb")
+        else:
+            f = os.fdopen(fd, "w", encoding="utf-8", buffering=1 << 16)
+        with f:
+            fill(f)
+        if mode_from is not None:
+            shutil.copymode(mode_from, tmp_path)
+        os.replace(tmp_path, os.path.join(directory, name))
+        tmp_path = None
+        _evict(directory)
+    except OSError:
+        pass
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
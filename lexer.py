@@ -2,91 +2,137 @@
 
 import os
 import re
+import string
+import sys
+from functools import lru_cache
 from typing import Dict, List, Optional, Set, Tuple
 
 from errors import CompilerError, ErrorCode
 
 # Precompiled regexes for better performance
-IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+# Characters an identifier can start with; numbers, string literals and
+# expressions fail this before reaching the (memoized) regex check
+IDENTIFIER_START = frozenset(string.ascii_letters + "_")
 TOKEN_RE = re.compile(r'"[^"]*"|\S+')
-
-OPS = {
-    "LET",
-    "ADD",
-    "SUB",
-    "MUL",
-    "DIV",
-    "PRINT",
-    "READ",
-    "MOD",
-    "INC",
-    "DEC",
-    "CALL",
-    "RET",
-    "ERROR",
-    "FNDEF",
-    "FN",
-    "FOR",
-    "WHILE",
-    "IF",
-    "ELSE",
-    "ELIF",
-    "PRINTSTR",
-    "PRINTARR",
-    "CONST",
-    "ARR",
-    "LEN",
-    "PUSH",
-    "POP",
-    "PTR",
-    "IMPORT",
-}
+# Parentheses only, so CALL can find the end of its argument list without
+# walking the line a character at a time
+PAREN_RE = re.compile(r"[()]")
+
+OPS = frozenset(
+    {
+        "LET",
+        "ADD",
+        "SUB",
+        "MUL",
+        "DIV",
+        "PRINT",
+        "READ",
+        "MOD",
+        "INC",
+        "DEC",
+        "CALL",
+        "RET",
+        "ERROR",
+        "FNDEF",
+        "FN",
+        "FOR",
+        "WHILE",
+        "IF",
+        "ELSE",
+        "ELIF",
+        "PRINTSTR",
+        "PRINTARR",
+        "CONST",
+        "ARR",
+        "LEN",
+        "PUSH",
+        "POP",
+        "PTR",
+        "IMPORT",
+    }
+)
+
+# Opcode spelling as written -> canonical uppercase opcode. Seeded with the
+# canonical spellings; other casings are added the first time they are seen,
+# so the per-line upper() only runs once per distinct spelling.
+OP_SPELLINGS: Dict[str, str] = {op: op for op in OPS}
+
+# Z value types, as written in declarations and signatures
+PRIMITIVE_TYPES = frozenset({"int", "float", "double", "string", "bool"})
+
+# Python-style boolean spellings, rejected with a hint to use true/false
+INVALID_BOOL_LITERALS = frozenset({"True", "False"})
+
+# Identifier-shaped operands that are never variables
+NON_VARIABLE_WORDS = frozenset(
+    {
+        "int",
+        "float",
+        "double",
+        "string",
+        "bool",
+        "from",
+        "to",
+        "mut",
+        "const",
+        "true",
+        "false",
+        "main",
+    }
+)
 
 # Array types
-ARRAY_TYPES = {"Aint", "Afloat", "Adouble", "Abool", "Astring"}
-
-C_KEYWORDS = {
-    "auto",
-    "break",
-    "case",
-    "char",
-    "const",
-    "continue",
-    "default",
-    "do",
-    "double",
-    "else",
-    "enum",
-    "extern",
-    "float",
-    "for",
-    "goto",
-    "if",
-    "inline",
-    "int",
-    "long",
-    "register",
-    "restrict",
-    "return",
-    "short",
-    "signed",
-    "sizeof",
-    "static",
-    "struct",
-    "switch",
-    "typedef",
-    "union",
-    "unsigned",
-    "void",
-    "volatile",
-    "while",
-}
-
-
+ARRAY_TYPES = frozenset({"Aint", "Afloat", "Adouble", "Abool", "Astring"})
+
+C_KEYWORDS = frozenset(
+    {
+        "auto",
+        "break",
+        "case",
+        "char",
+        "const",
+        "continue",
+        "default",
+        "do",
+        "double",
+        "else",
+        "enum",
+        "extern",
+        "float",
+        "for",
+        "goto",
+        "if",
+        "inline",
+        "int",
+        "long",
+        "register",
+        "restrict",
+        "return",
+        "short",
+        "signed",
+        "sizeof",
+        "static",
+        "struct",
+        "switch",
+        "typedef",
+        "union",
+        "unsigned",
+        "void",
+        "volatile",
+        "while",
+    }
+)
+
+
+# Operands repeat heavily (the same few variable names on most lines), so
+# both classifiers are memoized.
+@lru_cache(maxsize=4096)
 def is_identifier(token: str) -> bool:
-    return bool(IDENTIFIER_RE.match(token))
+    return IDENTIFIER_RE.fullmatch(token) is not None
 
 
+@lru_cache(maxsize=4096)
 def is_number(token: str) -> bool:
     try:
         float(token)
@@ -95,16 +141,63 @@ def is_number(token: str) -> bool:
         return False
 
 
-def parse_z_file(
-    z_file: str,
-) -> Tuple[list, set, Dict[Tuple[Optional[str], str], Dict[str, object]]]:
-    """Parse ZLang source file and return (instructions, variables, declarations).
-    declarations: map of (scope, var_name) -> { 'mutable': bool, 'line': int }
-    scope is function name or None for global scope.
+def tokenize_line(line: str) -> List[str]:
+    """Split a stripped, comment-free source line into tokens.
+
+    Array accesses after PRINT and array literals after ARR are kept as
+    single tokens; everything else goes through TOKEN_RE.
+    """
+    if line.startswith("PRINT "):
+        # Extract the expression after PRINT
+        expr = line[5:].strip()
+        if "[" in expr and "]" in expr:
+            # This is an array access, handle it as a single token
+            return ["PRINT", expr]
+        return TOKEN_RE.findall(line)
+
+    if line.startswith("ARR "):
+        # Handle array declaration format: ARR type name size [values...]
+        if "[" in line and "]" in line and len(line.split()) >= 4:
+            start_idx = line.find("[")
+            end_idx = line.rfind("]")
+            before_tokens = TOKEN_RE.findall(line[:start_idx])
+            before_tokens.append(line[start_idx : end_idx + 1])
+            return before_tokens
+        return TOKEN_RE.findall(line)
+
+    # Handle ELSE: as a single token ("IF" also covers ELIF)
+    if "ELSE:" in line and "IF" not in line:
+        line = line.replace("ELSE:", "ELSE")
+    # Without a string literal TOKEN_RE reduces to \S+, which is what
+    # str.split does natively; most lines take this path
+    if '"' not in line:
+        return line.split()
+    return TOKEN_RE.findall(line)
+
+
+def strip_comment(line: str) -> str:
+    """Drop a trailing // comment, leaving // inside string literals alone."""
+    idx = line.find("//")
+    if idx == -1:
+        return line
+    if line.find('"', 0, idx) == -1:
+        return line[:idx].rstrip()
+    # String literals have no escapes, so a // preceded by an even number of
+    # quotes sits outside any literal.
+    while idx != -1:
+        if line.count('"', 0, idx) % 2 == 0:
+            return line[:idx].rstrip()
+        idx = line.find("//", idx + 2)
+    return line
+
+
+def read_source_lines(z_file: str):
+    """Yield the lines of a source file lazily, one buffered read at a time.
+    Decoding and I/O failures surface as CompilerError.
     """
     try:
-        with open(z_file, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        with open(z_file, "r", encoding="utf-8", buffering=1 << 16) as f:
+            yield from f
     except UnicodeDecodeError:
         raise CompilerError(
             f"File encoding error - only UTF-8 files are supported",
@@ -116,7 +209,17 @@ def parse_z_file(
             f"Cannot read file: {e}", error_code=ErrorCode.IO_ERROR, file_path=z_file
         )
 
-    instructions, variables = [], set()
+
+def parse_z_file(
+    z_file: str,
+) -> Tuple[list, Dict[str, None], Dict[Tuple[Optional[str], str], Dict[str, object]]]:
+    """Parse ZLang source file and return (instructions, variables, declarations).
+    variables: identifiers in first-use order (a dict used as an ordered set).
+    declarations: map of (scope, var_name) -> { 'mutable': bool, 'line': int }
+    scope is function name or None for global scope.
+    """
+    instructions, variables = [], {}
+    variable_candidates: Dict[str, int] = {}  # operand -> first line seen
     indent_stack = [0]  # Track indentation levels
 
     # Track current function scope via FNDEF/INDENT/DEDENT events
@@ -126,18 +229,20 @@ def parse_z_file(
     # Declarations with mutability info
     declarations: Dict[Tuple[Optional[str], str], Dict[str, object]] = {}
 
-    for line_num, raw in enumerate(lines, 1):
-        # Calculate indentation - normalize tabs to spaces for consistent calculation
-        line = raw.rstrip("\n")
-        # Replace tabs with spaces (4 spaces per tab, standard Python indentation)
-        normalized_line = line.replace("\t", "    ")
-        indent = len(normalized_line) - len(normalized_line.lstrip())
-        line = line.strip()
-
-        # Skip empty lines and comments
-        if not line or line.startswith("//"):
+    for line_num, raw in enumerate(read_source_lines(z_file), 1):
+        # Comments are stripped here, once, so comment-only lines are
+        # skipped by the same emptiness check as blank lines, before any
+        # indentation work is done for them
+        body = raw.lstrip()
+        line = strip_comment(body.rstrip())
+        if not line:
             continue
 
+        # Calculate indentation from the leading whitespace only; tabs count
+        # as 4 spaces (standard Python indentation)
+        leading = raw[: len(raw) - len(body)]
+        indent = len(leading) + 3 * leading.count("\t")
+
         # Handle indentation changes
         if indent > indent_stack[-1]:
             # New block started
@@ -159,47 +264,18 @@ def parse_z_file(
                     "Inconsistent indentation", line_num, ErrorCode.SYNTAX_ERROR, z_file
                 )
 
-        # Remove comments and process the line
-        line = line.split("//")[0].strip()
-        if not line:
-            continue
-
-        # Special handling for array access in print statements
-        line_stripped = line.strip()
-        if line_stripped.startswith("PRINT "):
-            # Extract the expression after PRINT
-            expr = line[5:].strip()
-            if "[" in expr and "]" in expr:
-                # This is an array access, handle it as a single token
-                tokens = ["PRINT", expr]
-            else:
-                tokens = TOKEN_RE.findall(line)
-        # Special handling for array declarations
-        elif line_stripped.startswith("ARR "):
-            # Handle array declaration format: ARR type name size [values...]
-            parts = line_stripped.split()
-            if len(parts) >= 4 and "[" in line and "]" in line:
-                start_idx = line.find("[")
-                end_idx = line.rfind("]")
-                array_values = line[start_idx : end_idx + 1]
-
-                before_values = line[:start_idx].strip()
-                before_tokens = TOKEN_RE.findall(before_values)
-                tokens = before_tokens + [array_values]
-            else:
-                tokens = TOKEN_RE.findall(line)
-        else:
-            # Handle ELSE: as a single token
-            if "ELSE:" in line and not ("IF" in line or "ELIF" in line):
-                # Replace 'ELSE:' with 'ELSE' to handle it as a single token
-                line = line.replace("ELSE:", "ELSE")
-            tokens = TOKEN_RE.findall(line)
-
+        tokens = tokenize_line(line)
         if not tokens:
             continue
 
-        op = tokens[0].upper()
-        operands = tokens[1:]
+        op = OP_SPELLINGS.get(tokens[0])
+        if op is None:
+            op = sys.intern(tokens[0].upper())
+            if op in OPS:
+                OP_SPELLINGS[tokens[0]] = op
+        # Operands end up as keys in the variable, declaration and codegen
+        # tables; interning them lets those lookups hit on identity.
+        operands = list(map(sys.intern, tokens[1:]))
 
         # Validate that the opcode is known
         if op not in OPS:
@@ -215,15 +291,17 @@ def parse_z_file(
             decl = line[2:].strip()  # after 'FN'
             decl = decl[:-1] if decl.endswith(":") else decl
             # Split off return type if present
-            ret_type = None
-            if "->" in decl:
-                decl, ret_type = decl.split("->", 1)
+            decl, arrow, ret_type = decl.partition("->")
+            if arrow:
                 decl = decl.strip()
                 ret_type = ret_type.strip()
+            else:
+                ret_type = None
             # Name and params
-            if "(" in decl and ")" in decl:
-                func_name = decl.split("(")[0].strip()
-                params_str = decl.split("(", 1)[1].rsplit(")", 1)[0].strip()
+            func_name, paren, params_str = decl.partition("(")
+            if paren and ")" in params_str:
+                func_name = sys.intern(func_name.strip())
+                params_str = params_str.rpartition(")")[0].strip()
                 params = []
                 if params_str:
                     for p in params_str.split(","):
@@ -231,14 +309,8 @@ def parse_z_file(
                         if not p:
                             continue
                         parts = p.split()
-                        if len(parts) == 2 and parts[0] in {
-                            "int",
-                            "float",
-                            "double",
-                            "bool",
-                            "string",
-                        }:
-                            params.extend(parts)  # [type, name]
+                        if len(parts) == 2 and parts[0] in PRIMITIVE_TYPES:
+                            params.extend(map(sys.intern, parts))  # [type, name]
                         else:
                             raise CompilerError(
                                 f"Function parameter '{p}' requires explicit type declaration (e.g., int param)",
@@ -254,7 +326,7 @@ def parse_z_file(
                 current_function = func_name
                 func_depth = 0
             else:
-                func_name = decl.strip()
+                func_name = sys.intern(decl.strip())
                 instructions.append(("FNDEF", [func_name], line_num))
                 current_function = func_name
                 func_depth = 0
@@ -280,10 +352,11 @@ def parse_z_file(
                     if "(" in joined and ")" in joined:
                         # Count parentheses to find the actual end of the function call
                         paren_count = 0
-                        for i, char in enumerate(joined):
-                            if char == "(":
+                        for paren in PAREN_RE.finditer(joined):
+                            if paren.group() == "(":
                                 paren_count += 1
-                            elif char == ")":
+                            else:
+                                i = paren.start()
                                 paren_count -= 1
                                 if paren_count == 0:
                                     # Everything after the closing parenthesis could be the return variable
@@ -300,8 +373,9 @@ def parse_z_file(
             # Parse function name and arguments
             if "(" in call_expr and call_expr.endswith(")"):
                 # Function call with arguments: name(arg1, arg2)
-                fname = call_expr.split("(")[0].strip()
-                args_str = call_expr.split("(", 1)[1][:-1].strip()
+                fname, _, args_str = call_expr.partition("(")
+                fname = fname.strip()
+                args_str = args_str[:-1].strip()
                 args = [a.strip() for a in args_str.split(",")] if args_str else []
             else:
                 # Function call without arguments: name
@@ -311,7 +385,8 @@ def parse_z_file(
             if ret_var is None:
                 ret_var = "_"
 
-            instructions.append(("CALL", [fname] + args + [ret_var], line_num))
+            call_operands = list(map(sys.intern, [fname, *args, ret_var]))
+            instructions.append(("CALL", call_operands, line_num))
             continue
 
         # Special handling for FOR loops with .. syntax
@@ -329,8 +404,7 @@ def parse_z_file(
 
         # Handle CONST with type declarations
         if op == "CONST":
-            type_keywords = ["int", "float", "double", "string", "bool"]
-            if operands and operands[0] in type_keywords:
+            if operands and operands[0] in PRIMITIVE_TYPES:
                 type_decl = operands[0]
                 remaining = operands[1:]
                 if not remaining:
@@ -341,11 +415,11 @@ def parse_z_file(
                         z_file,
                     )
                 dest = remaining[0]
-                expr = " ".join(remaining[1:]).strip()
-                if expr:
-                    operands = [type_decl, dest] + [expr]
-                else:
-                    operands = [type_decl, dest]
+                # [type, dest] and [type, dest, expr] are already in final
+                # form; only a multi-token expression is joined back up.
+                # Tokens carry no surrounding whitespace, so nothing to strip.
+                if len(operands) > 3:
+                    operands = [type_decl, dest, " ".join(operands[2:])]
                 declarations[(current_function, dest)] = {
                     "const": True,
                     "type": type_decl,
@@ -361,8 +435,7 @@ def parse_z_file(
 
         # Handle LET with type declarations (mutable by default)
         if op == "LET":
-            type_keywords = ["int", "float", "double", "string", "bool"]
-            if operands and operands[0] in type_keywords:
+            if operands and operands[0] in PRIMITIVE_TYPES:
                 # MOV <type> <dest> [expr]  -> mutable by default
                 type_decl = operands[0]
                 remaining = operands[1:]
@@ -374,11 +447,9 @@ def parse_z_file(
                         z_file,
                     )
                 dest = remaining[0]
-                expr = " ".join(remaining[1:]).strip()
-                if expr:
-                    operands = [type_decl, dest] + [expr]
-                else:
-                    operands = [type_decl, dest]
+                # Same as CONST: only a multi-token expression is joined
+                if len(operands) > 3:
+                    operands = [type_decl, dest, " ".join(operands[2:])]
                 declarations[(current_function, dest)] = {
                     "const": False,
                     "type": type_decl,
@@ -386,9 +457,8 @@ def parse_z_file(
                 }
             elif len(operands) >= 2:
                 # LET <dest> <expr> - assignment to existing variable
-                dest = operands[0]
-                expr = " ".join(operands[1:]).strip()
-                operands = [dest, expr]
+                if len(operands) > 2:
+                    operands = [operands[0], " ".join(operands[1:])]
                 # Note: We don't add to declarations since it's a reassignment
             else:
                 # Require explicit type declaration
@@ -399,59 +469,23 @@ def parse_z_file(
                     z_file,
                 )
 
-        # Validate operands for invalid boolean literals before processing
-        for i, t in enumerate(operands):
-            stripped = t.strip()
-            if stripped in {"True", "False"}:
-                raise CompilerError(
-                    f"Invalid boolean literal '{stripped}'. Use 'true' or 'false' (lowercase)",
-                    error_code=ErrorCode.SYNTAX_ERROR,
-                    file_path=z_file,
-                    line_num=line_num,
-                )
+        # Validate operands for invalid boolean literals before processing.
+        # Operands are already whitespace-free tokens or stripped
+        # expressions, so one set test covers the whole line.
+        if not INVALID_BOOL_LITERALS.isdisjoint(operands):
+            bad = next(t for t in operands if t in INVALID_BOOL_LITERALS)
+            raise CompilerError(
+                f"Invalid boolean literal '{bad}'. Use 'true' or 'false' (lowercase)",
+                error_code=ErrorCode.SYNTAX_ERROR,
+                file_path=z_file,
+                line_num=line_num,
+            )
 
-        # Build variables set: only identifiers
+        # Variable candidates are classified once per distinct token after
+        # the loop; keep the first line each one appears on for errors
         for t in operands:
-            if t is None:
-                continue
-            # strip punctuation around identifiers
-            t_clean = t
-            if "[" in t_clean and "]" in t_clean:
-                t_clean = t_clean.split("[", 1)[0]
-            if t_clean.endswith(":"):
-                continue
-            if t_clean in {
-                "int",
-                "float",
-                "double",
-                "string",
-                "bool",
-                "from",
-                "to",
-                "..",
-                "mut",
-                "const",
-            }:
-                continue
-            if t_clean.startswith('"') and t_clean.endswith('"'):
-                continue
-            if "(" in t_clean or ")" in t_clean:
-                continue
-            if is_number(t_clean):
-                continue
-            # Filter out boolean literals
-            if t_clean in {"true", "false"}:
-                continue
-            # Reject invalid boolean literals (redundant but kept for safety)
-            if t_clean in {"True", "False"}:
-                raise CompilerError(
-                    f"Invalid boolean literal '{t_clean}'. Use 'true' or 'false' (lowercase)",
-                    error_code=ErrorCode.SYNTAX_ERROR,
-                    file_path=z_file,
-                    line_num=line_num,
-                )
-            if is_identifier(t_clean) and t_clean != "main":
-                variables.add(t_clean)
+            if t not in variable_candidates:
+                variable_candidates[t] = line_num
 
         instructions.append((op, operands, line_num))
 
@@ -464,4 +498,30 @@ def parse_z_file(
             if func_depth == 0:
                 current_function = None
 
+    # Collect variables: only identifiers
+    for t, first_line in variable_candidates.items():
+        # strip array indexing; strings, calls, "x:" and ".." are all
+        # rejected by the identifier check itself
+        t_clean = t
+        if "[" in t_clean and "]" in t_clean:
+            t_clean = t_clean.split("[", 1)[0]
+        if (
+            t_clean[:1] not in IDENTIFIER_START
+            or not is_identifier(t_clean)
+            or t_clean in NON_VARIABLE_WORDS
+        ):
+            continue
+        # Reject invalid boolean literals (redundant but kept for safety)
+        if t_clean in INVALID_BOOL_LITERALS:
+            raise CompilerError(
+                f"Invalid boolean literal '{t_clean}'. Use 'true' or 'false' (lowercase)",
+                error_code=ErrorCode.SYNTAX_ERROR,
+                file_path=z_file,
+                line_num=first_line,
+            )
+        # float() also accepts names such as "inf" and "nan"
+        if is_number(t_clean):
+            continue
+        variables[t_clean] = None
+
     return instructions, variables, declarations
@@ -13,23 +13,39 @@ from setup import Colors, print_colored, is_in_path, run_setup, handle_cli_setup
 try:
     from lexer import parse_z_file
     from optimizer import optimize_instructions
-    from codegen import generate_c_code
+    from codegen import generate_c_lines, write_c_code
     from errors import CompilerError, CompilerErrorCollection, ErrorCode
     from semantics import validate_const_and_types
+    from cache import (
+        artifact_key, cache_key, cached_artifact, cached_c_file, clear_cache,
+        store_artifact, store_c_copy, store_c_file, CACHE_DIR,
+    )
 except ImportError:
     # If running as standalone executable, modules might not be available
     parse_z_file = None
     optimize_instructions = None
-    generate_c_code = None
+    generate_c_lines = None
+    write_c_code = None
     CompilerError = None
     ErrorCode = None
     validate_const_and_types = None
+    cache_key = cached_c_file = store_c_copy = store_c_file = None
+    artifact_key = cached_artifact = store_artifact = clear_cache = None
+    CACHE_DIR = None
+
+
+# (lower bound in seconds, scale, unit), largest unit first
+TIME_UNITS = (
+    (1e-3, 1e3, "ms"),
+    (1e-6, 1e6, "μs"),
+    (float("-inf"), 1e9, "ns"),
+)
+
+
 def format_time(seconds):
-    if seconds < 0.001:  # Less than 1ms
-        if seconds < 0.000001:  # Less than 1μs
-            return f"{seconds * 1e9:.1f} ns"
-        return f"{seconds * 1e6:.1f} μs"
-    return f"{seconds * 1000:.1f} ms"
+    for threshold, scale, unit in TIME_UNITS:
+        if seconds >= threshold:
+            return f"{seconds * scale:.1f} {unit}"
 
 # ============ INSTALLATION FUNCTIONS ============
 
@@ -47,7 +63,7 @@ SETUP:
     z --version      Show version
 
 USAGE:
-    z <source.z> [options]
+    z <source.z> [more.z ...] [options]
     z -h                     Show this help
 
 Options:
@@ -57,6 +73,9 @@ Options:
                               asm  → generate assembly code (.s)
     -o, --output <file>     Output file name (default: <source>.<format>)
     -c, --compiler <name>   C compiler to use (clang, gcc, tcc) [default: clang]
+    --no-cache              Always regenerate and recompile instead of reusing cached output
+    --keep-c                Also keep the generated .c file when building exe/asm
+    --clear-cache           Remove all cached C and executables, then exit
     -h, --help              Show this help
     -v, --version           Show version
 
@@ -64,6 +83,7 @@ Examples:
     z program.z              # Compile to program.exe
     z program.z -f c         # Generate program.c
     z program.z -f asm     # Generate program.s assembly
+    z a.z b.z c.z            # Build several files in parallel
     z run program.z        # Compile and run program
 """
 
@@ -132,6 +152,43 @@ def run_command(cmd, check=False):
     except Exception as e:
         return False, "", f"Command '{' '.join(cmd)}' failed: {str(e)}"
 
+def run_compiler(cmd, c_lines=None):
+    """
+    Run the C compiler and return a CompletedProcess with decoded output.
+    
+    If c_lines is given it is streamed to the compiler's stdin line by line,
+    so the generated code is never joined into one string. Compiler output
+    goes to temporary files instead of pipes, so writing the source can never
+    block on a full stdout/stderr pipe.
+    """
+    if c_lines is None:
+        return subprocess.run(cmd, capture_output=True, encoding='utf-8', errors='replace', check=False)
+
+    import tempfile
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=out, stderr=err, encoding='utf-8')
+        # A compiler that exits early breaks the pipe: BrokenPipeError on
+        # POSIX, OSError(EINVAL) on Windows. Its diagnostics are in err and
+        # the return code below reports the failure.
+        try:
+            write_c_code(c_lines, proc.stdin)
+        except OSError:
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+        returncode = proc.wait()
+        out.seek(0)
+        err.seek(0)
+        return subprocess.CompletedProcess(
+            cmd,
+            returncode,
+            out.read().decode('utf-8', errors='replace'),
+            err.read().decode('utf-8', errors='replace')
+        )
+
 def find_compiler(preferred_compiler: Optional[str] = None, silent: bool = False) -> Tuple[Optional[str], Optional[list]]:
     """
     Find available C compiler, using preferred_compiler if specified,
@@ -257,8 +314,9 @@ def find_compiler(preferred_compiler: Optional[str] = None, silent: bool = False
 
     raise CompilerError(error_msg, error_code=ErrorCode.MISSING_DEPENDENCY)
 
-def compile_zlang(input_path: str, output_path: str, output_format: str, compiler: str = 'clang', generate_assembly: bool = False, run_after_compile: bool = False):
-    """Compile ZLang source into C or executable."""
+def compile_zlang(input_path: str, output_path: str, output_format: str, compiler: str = 'clang', generate_assembly: bool = False, run_after_compile: bool = False, use_cache: bool = True, keep_c: bool = False):
+    """Compile ZLang source into C or executable. With keep_c, exe/asm builds
+    also leave the generated .c file next to the output."""
     abs_c_file = None  # Track C file for cleanup
     try:
         # Validate and resolve input path
@@ -274,23 +332,25 @@ def compile_zlang(input_path: str, output_path: str, output_format: str, compile
         # Parse and generate code with timing
         start_time = time.time()
         
-        # 1. Parsing
-        parse_start = time.time()
-        instructions, variables, declarations = parse_z_file(validated_input_path)
-        parse_time = time.time() - parse_start
-        
-        # 2. Optimization
-        opt_start = time.time()
-        optimized = optimize_instructions(instructions, validated_input_path)
-        opt_time = time.time() - opt_start
-        
-        # 2.5 Semantic validation (const and type enforcement)
-        validate_const_and_types(optimized, declarations, validated_input_path)
-        
-        # 3. Code Generation
-        gen_start = time.time()
-        c_code = generate_c_code(optimized, variables, declarations, z_file=validated_input_path)
-        gen_time = time.time() - gen_start
+        # 0. Cache lookup: unchanged source (and imports) reuse the generated C
+        key = cache_key(validated_input_path) if use_cache and cache_key else None
+        cached_c = cached_c_file(key) if key else None
+
+        parse_time = opt_time = gen_time = 0
+        c_lines = None
+        if cached_c is None:
+            # 1. Parsing
+            parse_start = time.time()
+            instructions, variables, declarations = parse_z_file(validated_input_path)
+            parse_time = time.time() - parse_start
+            
+            # 2. Optimization
+            opt_start = time.time()
+            optimized = optimize_instructions(instructions, validated_input_path)
+            opt_time = time.time() - opt_start
+            
+            # 2.5 Semantic validation (const and type enforcement)
+            validate_const_and_types(optimized, declarations, validated_input_path)
                
         # Determine output file paths
         base_output = os.path.splitext(output_path)[0]
@@ -309,23 +369,7 @@ def compile_zlang(input_path: str, output_path: str, output_format: str, compile
             if not abs_output_path.lower().endswith('.c'):
                 abs_output_path += '.c'
         
-        # Write C code to file
-        write_start = time.time()
-        try:
-            with open(abs_c_file, 'w', encoding='utf-8') as f:
-                f.write(c_code)
-            write_time = time.time() - write_start
-        except IOError as e:
-            raise CompilerError(
-                f"Failed to write output file '{abs_c_file}': {str(e)}",
-                error_code=ErrorCode.FILE_WRITE_ERROR,
-                file_path=validated_input_path
-            ) from e
-        
-        compile_time = 0
-        link_time = 0
-        
-        # If target is executable or assembly, compile the C code
+        compiler_name = compiler_cmd = None
         if output_format in ['exe', 's']:
             # Only show compiler info if not in 'run' mode
             silent = run_after_compile  # Be silent if we're going to run the program
@@ -338,10 +382,73 @@ def compile_zlang(input_path: str, output_path: str, output_format: str, compile
                     validated_input_path
                 )
 
-            compile_cmd = [
-                *compiler_cmd,
-                abs_c_file,
-                '-o', abs_output_path,
+        # clang/gcc/tcc read the translation unit from stdin (-x c -), so for
+        # exe/asm output the code is piped straight in instead of going through
+        # a temporary .c file. Any other compiler (MSVC, or an unknown -c name)
+        # gets a real file, and so does --keep-c.
+        pipe_source = compiler_name in ('clang', 'gcc', 'tcc') and not keep_c
+        keep_c_file = output_format == 'c' or keep_c
+
+        # 3. Code Generation. Piped code is kept in memory for the compiler;
+        # otherwise it is streamed straight into the .c file (see below).
+        if cached_c is None and pipe_source:
+            gen_start = time.time()
+            c_lines = generate_c_lines(optimized, variables, declarations, z_file=validated_input_path)
+            gen_time = time.time() - gen_start
+
+        # Write C code to file
+        write_time = 0
+        if pipe_source or (cached_c and not keep_c_file):
+            abs_c_file = None  # Nothing on disk to clean up
+        else:
+            # Written under a temporary name and moved into place with
+            # os.replace, so a failed or interrupted build never leaves a
+            # truncated .c file behind (or clobbers a previous good one)
+            c_path, abs_c_file = abs_c_file, None
+            tmp_c_file = c_path + '.tmp'
+            write_start = time.time()
+            try:
+                if cached_c:
+                    shutil.copyfile(cached_c, tmp_c_file)
+                    os.replace(tmp_c_file, c_path)
+                    write_time = time.time() - write_start
+                else:
+                    # Generation and writing are one step here, timed as CodeGen
+                    with open(tmp_c_file, 'w', encoding='utf-8', buffering=1 << 16) as f:
+                        generate_c_lines(optimized, variables, declarations, z_file=validated_input_path, out=f)
+                    os.replace(tmp_c_file, c_path)
+                    gen_time = time.time() - write_start
+                    # exe/asm builds cache their C once it has compiled
+                    if key and output_format == 'c':
+                        store_c_copy(key, c_path)
+                abs_c_file = c_path
+            except IOError as e:
+                raise CompilerError(
+                    f"Failed to write output file '{c_path}': {str(e)}",
+                    error_code=ErrorCode.FILE_WRITE_ERROR,
+                    file_path=validated_input_path
+                ) from e
+            finally:
+                if os.path.exists(tmp_c_file):
+                    try:
+                        os.remove(tmp_c_file)
+                    except OSError:
+                        pass
+        
+        compile_time = 0
+        
+        # If target is executable or assembly, compile the C code
+        if output_format in ['exe', 's']:
+            stdin_lines = None
+            if cached_c:
+                source_args = [cached_c]  # Compile the cache entry in place
+            elif pipe_source:
+                source_args = ['-x', 'c', '-']
+                stdin_lines = c_lines
+            else:
+                source_args = [abs_c_file]
+
+            compile_flags = [
                 '-O2',  # Optimize for speed
                 '-Wall',  # Enable all warnings
                 '-Wextra',  # Enable extra warnings
@@ -351,10 +458,11 @@ def compile_zlang(input_path: str, output_path: str, output_format: str, compile
 
             # Add platform-specific flags
             if compiler_name == 'msvc':
-                compile_cmd.extend(['/nologo', '/W4', '/WX', '/O2'])
+                compile_flags.extend(['/nologo', '/W4', '/WX', '/O2'])
             elif compiler_name in ('clang', 'gcc'):
-                # clang/gcc specific flags
-                compile_cmd.extend(['-march=native', '-fno-strict-aliasing'])
+                # clang/gcc specific flags; -pipe passes data between the
+                # compiler stages through pipes instead of temporary files
+                compile_flags.extend(['-march=native', '-fno-strict-aliasing', '-pipe'])
             elif compiler_name == 'tcc':
                 # tcc is more permissive but doesn't support certain gcc/clang flags;
                 # don't add GCC/Clang-specific tuning flags.
@@ -362,11 +470,21 @@ def compile_zlang(input_path: str, output_path: str, output_format: str, compile
 
             if output_format == 's':
                 if compiler_name == 'msvc':
-                    compile_cmd.extend(['/Fa', '/c'])
+                    compile_flags.extend(['/Fa', '/c'])
+
+            compile_cmd = [*compiler_cmd, *source_args, '-o', abs_output_path, *compile_flags]
+
+            # Same source, compiler and flags: reuse the previously built artifact
+            artifact = artifact_key(key, compiler_cmd, compile_flags, output_format) if key else None
+            cached_out = cached_artifact(artifact) if artifact else None
 
             compile_start = time.time()
             try:
-                result = subprocess.run(compile_cmd, capture_output=True, text=True, check=False)
+                if cached_out:
+                    shutil.copy(cached_out, abs_output_path)
+                    result = subprocess.CompletedProcess(compile_cmd, 0, '', '')
+                else:
+                    result = run_compiler(compile_cmd, stdin_lines)
                 
                 # Check if compilation was successful but no output file was created
                 if result.returncode == 0 and not os.path.exists(abs_output_path):
@@ -398,6 +516,14 @@ def compile_zlang(input_path: str, output_path: str, output_format: str, compile
                         ErrorCode.COMPILATION_FAILED,
                         validated_input_path
                     )
+
+                # Only C that compiled is cached, so a failed build is
+                # regenerated (and its errors reported) on the next run
+                if key and cached_c is None:
+                    if c_lines is not None:
+                        store_c_file(key, c_lines)
+                    else:
+                        store_c_copy(key, abs_c_file)
                     
             except subprocess.CalledProcessError as e:
                 # Provide more detailed error information
@@ -420,16 +546,19 @@ def compile_zlang(input_path: str, output_path: str, output_format: str, compile
                 )
             finally:
                 # Clean up the C file if compilation fails
-                if abs_c_file and os.path.exists(abs_c_file) and not (output_format == 'c'):
+                if abs_c_file and os.path.exists(abs_c_file) and not keep_c_file:
                     try:
                         os.remove(abs_c_file)
                     except OSError:
                         pass
             
             compile_time = time.time() - compile_start
+
+            if artifact and not cached_out:
+                store_artifact(artifact, abs_output_path)
             
             # Clean up C file after successful compilation if not keeping it
-            if output_format != 'c':
+            if abs_c_file and not keep_c_file:
                 try:
                     os.remove(abs_c_file)
                     abs_c_file = None  # Mark as cleaned up
@@ -441,6 +570,10 @@ def compile_zlang(input_path: str, output_path: str, output_format: str, compile
             # Only show compilation summary if not in 'run' mode
             if not run_after_compile:
                 print("\n=== Compilation Summary ===")
+                if cached_out:
+                    print("Cache:         hit (parse/codegen/compile skipped)")
+                elif cached_c:
+                    print("Cache:         hit (parse/codegen skipped)")
                 print(f"Parsing:       {format_time(parse_time)}")
                 print(f"Optimization:  {format_time(opt_time)}")
                 print(f"CodeGen:       {format_time(gen_time)}")
@@ -518,7 +651,7 @@ def compile_zlang(input_path: str, output_path: str, output_format: str, compile
         sys.exit(1)
     except CompilerError:
         # Clean up C file if compilation failed and we created one
-        if abs_c_file and os.path.exists(abs_c_file):
+        if abs_c_file and not keep_c and os.path.exists(abs_c_file):
             try:
                 os.remove(abs_c_file)
             except OSError:
@@ -526,27 +659,82 @@ def compile_zlang(input_path: str, output_path: str, output_format: str, compile
         raise  # Re-raise the CompilerError
     except Exception:
         # Clean up C file if any unexpected error occurred and we created one
-        if abs_c_file and os.path.exists(abs_c_file):
+        if abs_c_file and not keep_c and os.path.exists(abs_c_file):
             try:
                 os.remove(abs_c_file)
             except OSError:
                 pass
         raise  # Re-raise the exception
 
+def _build_one(job):
+    """
+    Process-pool worker for compile_many.
+    
+    Returns (input path, error or None, output). The build's output is
+    captured instead of printed, so the parent can show each summary whole,
+    in input order, rather than interleaved with other workers.
+    """
+    import contextlib
+    import io
+    
+    input_path, output_format, compiler, use_cache, keep_c = job
+    output_path = f"{os.path.splitext(input_path)[0]}.{output_format}"
+    output = io.StringIO()
+    error = None
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            compile_zlang(input_path, output_path, output_format, compiler, use_cache=use_cache, keep_c=keep_c)
+        except SystemExit as e:
+            error = f"exited with code {e.code}" if e.code else None
+        except Exception as e:
+            error = str(e)
+    return input_path, error, output.getvalue()
+
+def compile_many(input_paths, output_format: str, compiler: str = 'clang', use_cache: bool = True, keep_c: bool = False) -> int:
+    """
+    Compile several independent source files in parallel.
+    
+    Each file is built in its own worker process (up to the CPU count), so
+    parsing and code generation run concurrently despite the GIL, and so do
+    the C compiler invocations. Outputs go next to each source, as with a
+    single file. Returns the number of files that failed.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    jobs = [(path, output_format, compiler, use_cache, keep_c) for path in input_paths]
+    failed = 0
+    with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as pool:
+        # map yields in input order, whatever order the builds finish in
+        for input_path, error, output in pool.map(_build_one, jobs):
+            if output:
+                print(output, end='')
+            if error:
+                failed += 1
+                print_colored(f"✗ {input_path}: {error}", Colors.RED)
+    return failed
+
 def parse_args(args):
-    """Simple flag-based CLI parser."""
+    """
+    Simple flag-based CLI parser.
+    
+    Returns (command, inputs, output_path, output_format, compiler,
+    generate_assembly, run_after_compile, use_cache, keep_c), where command
+    is "SETUP", "RUN" or "BUILD" and inputs is a list of source files.
+    """
     # Handle setup and run commands first
     if len(args) >= 2 and args[0] == "run":
-        return "RUN", args[1], None, "exe", False, True
+        return "RUN", [args[1]], None, "exe", 'clang', False, True, True, False
     if len(args) == 0:
-        return "SETUP", None, None, None, False, False
+        return "SETUP", [], None, None, None, False, False, True, False
     
-    input_file = None
+    input_files = []
     output_path = None
     output_format = "exe"  # Default to exe
     compiler = 'clang'  # Default compiler
     generate_assembly = False
     run_after_compile = False
+    use_cache = True
+    keep_c = False
     
     i = 0
     while i < len(args):
@@ -605,12 +793,19 @@ def parse_args(args):
         elif arg == "-R" or arg == "--run":
             run_after_compile = True
             
+        elif arg == "--no-cache":
+            use_cache = False
+            
+        elif arg == "--keep-c":
+            keep_c = True
+            
+        elif arg == "--clear-cache":
+            removed = clear_cache() if clear_cache else 0
+            print_colored(f"✓ Removed {removed} cached file(s) from {CACHE_DIR}", Colors.GREEN)
+            sys.exit(0)
+            
         elif not arg.startswith("-"):
-            if input_file is not None:
-                print_colored("Error: Multiple input files specified", Colors.RED)
-                print(HELP_TEXT)
-                sys.exit(1)
-            input_file = arg
+            input_files.append(arg)
             
         else:
             print_colored(f"Error: Unknown option '{arg}'", Colors.RED)
@@ -619,20 +814,25 @@ def parse_args(args):
             
         i += 1
     
-    if input_file is None:
+    if not input_files:
         print_colored("Error: No input file specified", Colors.RED)
         print(HELP_TEXT)
         sys.exit(1)
     
+    if len(input_files) > 1 and (output_path is not None or run_after_compile):
+        print_colored("Error: -o and -R take a single input file", Colors.RED)
+        print(HELP_TEXT)
+        sys.exit(1)
+    
     if output_path is None:
-        base = os.path.splitext(input_file)[0]
+        base = os.path.splitext(input_files[0])[0]
         output_path = f"{base}.{output_format}"
     
-    return input_file, output_path, output_format, compiler, generate_assembly, run_after_compile
+    return "BUILD", input_files, output_path, output_format, compiler, generate_assembly, run_after_compile, use_cache, keep_c
 
 def check_compilation_requirements():
     """Check if all required modules are available for compilation"""
-    if any(module is None for module in [parse_z_file, optimize_instructions, generate_c_code, CompilerError, ErrorCode, validate_const_and_types]):
+    if any(module is None for module in [parse_z_file, optimize_instructions, generate_c_lines, write_c_code, CompilerError, ErrorCode, validate_const_and_types]):
         print_colored("✗ Error: Compiler modules not found", Colors.RED)
         print_colored("This Z executable doesn't include the compiler components.", Colors.WHITE)
         print_colored("Please ensure all .py files are available or use a complete build.", Colors.WHITE)
@@ -640,28 +840,28 @@ def check_compilation_requirements():
     return True
 
 if __name__ == "__main__":
+    # Frozen Windows builds start compile_many's workers by re-running this
+    # executable; freeze_support hands them to the pool. It does nothing
+    # anywhere else, so unfrozen runs skip importing multiprocessing.
+    if getattr(sys, 'frozen', False):
+        from multiprocessing import freeze_support
+        freeze_support()
+    
     # Handle version and setup flags early
     if handle_cli_setup_and_version(sys.argv[1:]):
         sys.exit(0)
     
     try:
-        result = parse_args(sys.argv[1:])
+        (cmd, input_files, output_path, output_format, compiler,
+         generate_assembly, run_after_compile, use_cache, keep_c) = parse_args(sys.argv[1:])
         
         # Handle special commands
-        cmd = result[0]
         if cmd == "SETUP":
             sys.exit(run_setup())
+        input_file = input_files[0]
+        cleanup_exe = cmd == "RUN"  # Clean up the executable after running
         if cmd == "RUN":
-            input_file = result[1]
             output_path = os.path.splitext(input_file)[0] + ".exe"
-            output_format = "exe"
-            compiler = 'clang'
-            generate_assembly = False
-            run_after_compile = True
-            cleanup_exe = True  # Flag to clean up the executable after running
-        else:
-            input_file, output_path, output_format, compiler, generate_assembly, run_after_compile = result
-            cleanup_exe = False
         
         # Check if we're running from an uninstalled location without setup
         current_exe = Path(sys.executable).resolve()
@@ -680,6 +880,10 @@ if __name__ == "__main__":
         if not check_compilation_requirements():
             sys.exit(1)
         
+        # Several inputs: build them independently, in parallel
+        if len(input_files) > 1:
+            sys.exit(1 if compile_many(input_files, output_format, compiler, use_cache, keep_c) else 0)
+        
         # Proceed with compilation
         try:
             compile_zlang(
@@ -688,7 +892,9 @@ if __name__ == "__main__":
                 output_format, 
                 compiler,
                 generate_assembly=generate_assembly,
-                run_after_compile=run_after_compile
+                run_after_compile=run_after_compile,
+                use_cache=use_cache,
+                keep_c=keep_c
             )
         finally:
             # Clean up the executable if this was a 'run' command
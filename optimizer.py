@@ -1,5 +1,6 @@
 """Optimization stage for ZLang with advanced optimizations."""
 
+import operator
 from typing import Dict, List, Optional, Set, Tuple, Union
 
 from errors import CompilerError, ErrorCode
@@ -16,40 +17,43 @@ def is_numeric_operand(x: str) -> bool:
         return x[0] == "-" and len(x) > 1 and is_numeric_operand(x[1:])
 
 
+# Arithmetic opcodes the folder can evaluate, dispatched by opcode
+FOLDABLE_OPS = {
+    "ADD": operator.add,
+    "SUB": operator.sub,
+    "MUL": operator.mul,
+    "DIV": operator.truediv,
+    "MOD": operator.mod,
+}
+
+# Error for a constant zero divisor, by opcode
+ZERO_DIVISOR_MESSAGES = {
+    "DIV": "Division by zero in constant expression",
+    "MOD": "Modulo by zero in constant expression",
+}
+
+
 def fold_constant_expression(
     op: str, operands: List[str], line_num: int, z_file: str
 ) -> Optional[Union[float, int]]:
     """Attempt to fold a constant expression."""
+    fold = FOLDABLE_OPS.get(op)
+    if fold is None:
+        return None
     try:
         if not all(is_numeric_operand(x) for x in operands[:-1]):
             return None
 
         nums = [float(x) for x in operands[:-1]]
 
-        if op == "ADD":
-            return nums[0] + nums[1]
-        elif op == "SUB":
-            return nums[0] - nums[1]
-        elif op == "MUL":
-            return nums[0] * nums[1]
-        elif op == "DIV":
-            if nums[1] == 0:
-                raise CompilerError(
-                    "Division by zero in constant expression",
-                    error_code=ErrorCode.DIVISION_BY_ZERO,
-                    file_path=z_file,
-                    line_num=line_num,
-                )
-            return nums[0] / nums[1]
-        elif op == "MOD":
-            if nums[1] == 0:
-                raise CompilerError(
-                    "Modulo by zero in constant expression",
-                    error_code=ErrorCode.DIVISION_BY_ZERO,
-                    file_path=z_file,
-                    line_num=line_num,
-                )
-            return nums[0] % nums[1]
+        if nums[1] == 0 and op in ZERO_DIVISOR_MESSAGES:
+            raise CompilerError(
+                ZERO_DIVISOR_MESSAGES[op],
+                error_code=ErrorCode.DIVISION_BY_ZERO,
+                file_path=z_file,
+                line_num=line_num,
+            )
+        return fold(nums[0], nums[1])
     except (ValueError, IndexError, TypeError):
         pass
     return None
@@ -155,7 +159,7 @@ def optimize_instructions(
         new_optimized = []
         for op, operands, line_num in optimized:
             # Constant folding for arithmetic operations
-            if op in {"ADD", "SUB", "MUL", "DIV", "MOD"} and len(operands) >= 2:
+            if op in FOLDABLE_OPS and len(operands) >= 2:
                 result = fold_constant_expression(op, operands, line_num, z_file)
                 if result is not None and len(operands) == 3:
                     new_optimized.append(("LET", [str(result), operands[2]], line_num))
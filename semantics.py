@@ -1,6 +1,7 @@
 """Semantic checks for ZLang, including const enforcement, type checking, and semantic validation."""
 
 import os
+import re
 from typing import Any, Dict, List, Optional, Set, Tuple
 
 from errors import CompilerError, CompilerErrorCollection, ErrorCode
@@ -12,6 +13,10 @@ array_types = {"Aint", "Afloat", "Adouble", "Abool", "Astring"}
 # All valid types
 all_types = types_set.union(array_types)
 
+# Any comparison or logical operator in a condition (!=, <= and >= are
+# covered by their first character)
+condition_op_re = re.compile(r"==|[!<>]|&&|\|\|")
+
 # Mapping of array types to their element types
 array_type_map = {
     "Aint": "int",
@@ -1056,9 +1061,7 @@ class SemanticAnalyzer:
             # Simple check - in a real compiler, we'd parse the expression
             # Here we just check if it's a boolean variable or a comparison
             cond = " ".join(operands)
-            if not any(
-                op in cond for op in {"==", "!=", "<", ">", "<=", ">=", "&&", "||", "!"}
-            ):
+            if not condition_op_re.search(cond):
                 # Might be a boolean variable
                 self._check_variable_exists(operands[0], line_num)
                 var_type = self._get_type(operands[0])
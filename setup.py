@@ -1,7 +1,5 @@
 """Setup utilities for Z Compiler."""
 
-import ctypes
-import json
 import os
 import platform
 import shutil
@@ -11,16 +9,20 @@ import sys
 import tempfile
 from pathlib import Path
 from typing import Optional
-from urllib.request import Request, urlopen
 
 # Version information
 VERSION = "0.12.2"
 
-# Initialize colorama for Windows ANSI support
+# Initialize colorama for Windows ANSI support. A POSIX terminal handles the
+# codes natively, so init() (which proxies stdout/stderr and filters every
+# write) is only needed on Windows or to strip codes from redirected output.
 try:
     from colorama import Fore, Style, init
 
-    init()  # Initialize colorama
+    if os.name == "nt" or not all(
+        stream is not None and stream.isatty() for stream in (sys.stdout, sys.stderr)
+    ):
+        init()  # Initialize colorama
     HAS_COLORAMA = True
 except ImportError:
     HAS_COLORAMA = False
@@ -82,6 +84,8 @@ def is_admin():
     if not is_windows():
         return False
     try:
+        import ctypes
+
         return ctypes.windll.shell32.IsUserAnAdmin()
     except Exception:
         return False
@@ -255,6 +259,8 @@ def _dedupe_and_prepend_path(existing_path_str, new_dir):
 def broadcast_env_change():
     """Notify running processes that environment changed."""
     try:
+        import ctypes
+
         HWND_BROADCAST = 65535
         WM_SETTINGCHANGE = 26
         SMTO_ABORTIFHUNG = 2
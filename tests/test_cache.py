@@ -0,0 +1,65 @@
+"""Tests for the on-disk output cache."""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache  # noqa: E402
+
+
+class CacheKeyImportTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.old_cache_dir = cache.CACHE_DIR
+        cache.CACHE_DIR = os.path.join(self.tmp.name, "cache")
+        self.addCleanup(setattr, cache, "CACHE_DIR", self.old_cache_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_editing_quoted_import_with_space_misses(self):
+        self.write("my lib.z", "FN twice(int a) -> int:\n    ADD a a c\n")
+        main = self.write("main.z", 'IMPORT "my lib.z"\nFN main():\n    PRINT 1\n')
+
+        key = cache.cache_key(main)
+        cache.store_c_file(key, ["int main(void) { return 0; }"])
+        self.assertIsNotNone(cache.cached_c_file(key))
+
+        self.write("my lib.z", "FN twice(int a) -> int:\n    MUL a a c\n")
+        new_key = cache.cache_key(main)
+        self.assertNotEqual(key, new_key)
+        self.assertIsNone(cache.cached_c_file(new_key))
+
+    def test_bare_import_is_followed(self):
+        self.write("lib.z", "FN one() -> int:\n    RET 1\n")
+        main = self.write("main.z", "IMPORT lib.z\n")
+
+        key = cache.cache_key(main)
+        self.write("lib.z", "FN one() -> int:\n    RET 2\n")
+        self.assertNotEqual(key, cache.cache_key(main))
+
+
+class ArtifactKeyTests(unittest.TestCase):
+    def key_on_host(self, host, flags):
+        with mock.patch.object(cache.platform, "node", return_value=host):
+            return cache.artifact_key("src", ["cc"], flags, "exe")
+
+    def test_native_builds_are_per_host(self):
+        flags = ["-O2", "-march=native"]
+        self.assertNotEqual(self.key_on_host("a", flags), self.key_on_host("b", flags))
+
+    def test_portable_builds_are_shared_across_hosts(self):
+        flags = ["-O2"]
+        self.assertEqual(self.key_on_host("a", flags), self.key_on_host("b", flags))
+
+
+if __name__ == "__main__":
+    unittest.main()